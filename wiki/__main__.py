@@ -46,7 +46,7 @@ if __name__ == "__main__":
 
     params = WikiParameters(
         repo=".",  # Defaults to "libsdl-org/sdlwiki"
-        root=".",  # Defaults to pathlib.Path.cwd()
+        root=".",  # Defaults to os.getcwd()
         conversion_type=args.type,
         version=args.version,
         verbose=args.verbose,
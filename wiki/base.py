@@ -4,68 +4,126 @@ Module: wiki.base
 Description: Base class for converting SDL Wiki from HTML to a selected output format.
 """
 
+import functools
+import logging
+import os
 import platform
+import re
 import shutil
 import subprocess
-from typing import Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from wiki.logger import AutoLogger
 from wiki.params import WikiParameters
 
 
+@functools.lru_cache(maxsize=None)
+def which(command: str) -> Optional[str]:
+    """Cached shutil.which lookup. PATH is not expected to change during a run."""
+    return shutil.which(command)
+
+
+@functools.lru_cache(maxsize=256)
+def cached_fspath(path: "os.PathLike[str]") -> str:
+    """Cached os.fspath for paths that are passed to subprocesses repeatedly."""
+    return os.fspath(path)
+
+
 # NOTE: Not sure how I want to handle TEXT and PDF file paths just yet.
 # Leaving these here as a reminder to my future self.
 class WikiBase:
+    # Parallel submodule fetching (--jobs) requires git 2.8 or newer
+    GIT_JOBS_MIN_VERSION = (2, 8)
+    _git_version: Optional[Tuple[int, ...]] = None
+
     def __init__(self, params: WikiParameters):
         self.params = params
+        self.params.prepare()
         self.logger = AutoLogger.create(self.__class__.__name__, params.verbose)
 
     def log(self) -> None:
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return  # Nothing below is emitted unless verbose
         os_info = {
             "OS Name": platform.system(),
             "Platform Release": platform.release(),
         }
-        os_info.update(self.params.as_dict())
+        os_info.update(self.params.as_dict)
         for key, value in os_info.items():
-            self.logger.debug(f"{key}: {value}")
+            self.logger.debug("%s: %s", key, value)
 
     def test(self) -> None:
         prerequisites = ["git", "html2text", "pandoc", "xelatex"]
-        self.logger.debug(f"Required Prerequisites: {prerequisites}")
+        self.logger.debug("Required Prerequisites: %s", prerequisites)
         self.logger.debug("Asserting prerequisite discovery...")
-        for requisite in prerequisites:
-            if not shutil.which(requisite):
+        # Each lookup stats every PATH entry, so resolve them concurrently
+        with ThreadPoolExecutor(max_workers=len(prerequisites)) as executor:
+            results = dict(zip(prerequisites, executor.map(which, prerequisites)))
+        for requisite, location in results.items():
+            if location is None:
                 self.logger.error(f"{requisite} not found. Please install it.")
                 exit(1)
         self.logger.info("Prerequisite discovery completed successfully.")
 
-    def run(self, args: List[str]) -> subprocess.CompletedProcess[Any]:
-        # Restrict caller to passing in args
-        params = {"check": True, "capture_output": True, "text": True}
+    def run(self, args: List[str], capture: bool = False) -> "subprocess.CompletedProcess[bytes]":
+        # Restrict caller to passing in args; stdout is only kept when requested
+        params: Dict[str, Any] = {
+            "check": True,
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.PIPE if capture else subprocess.DEVNULL,
+            "stderr": subprocess.PIPE,
+        }
 
         try:
             # Allow caller to handle result
             result = subprocess.run(args, **params)
-            self.logger.debug(f"Command succeeded: {args}")
-            self.logger.debug(f"Output: {result.stdout}")
+            self.logger.debug("Command succeeded: %s", args)
+            if capture:
+                self.logger.debug("Output: %r", result.stdout)
             return result
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Command failed: {e.cmd}")
             self.logger.error(f"Return code: {e.returncode}")
-            self.logger.error(f"Output: {e.stdout}")
-            self.logger.error(f"Error: {e.stderr}")
+            if e.stdout:
+                self.logger.error(f"Output: {e.stdout.decode('utf-8', 'replace')}")
+            if e.stderr:
+                self.logger.error(f"Error: {e.stderr.decode('utf-8', 'replace')}")
             raise RuntimeError(f"Command failed: {' '.join(args)}") from e
 
+    @classmethod
+    def git_version(cls) -> Tuple[int, ...]:
+        """Detects the installed git version once and caches it on the class."""
+        if WikiBase._git_version is None:
+            version: Tuple[int, ...] = (0,)
+            if which("git"):
+                result = subprocess.run(["git", "--version"], capture_output=True, text=True)
+                match = re.search(r"(\d+)\.(\d+)", result.stdout)
+                if match:
+                    version = tuple(int(n) for n in match.groups())
+            WikiBase._git_version = version
+        return WikiBase._git_version
+
     def clone(self) -> None:
         repo_dir = self.params.REPO_PATH
-        if repo_dir.exists():
+        repo = cached_fspath(repo_dir)
+        jobs = []
+        if self.git_version() >= self.GIT_JOBS_MIN_VERSION:
+            jobs = [f"--jobs={os.cpu_count() or 8}"]
+
+        if repo_dir.is_dir():
             self.logger.debug("SDL Wiki directory already exists. Pulling latest changes...")
-            args = ["git", "-C", str(repo_dir), "pull", "origin", "main"]
+            self.run(["git", "-C", repo, "pull", "origin", "main"])
+            if jobs:
+                args = ["git", "-C", repo, "submodule", "update", "--init", "--recursive"]
+                self.run(args + jobs)
         else:
             self.logger.debug("Cloning SDL Wiki repository...")
             repo_url = f"https://github.com/{self.params.repo}"
-            args = ["git", "clone", repo_url, str(repo_dir)]
-        self.run(args)
+            args = ["git", "clone"]
+            if jobs:
+                args += ["--recurse-submodules"] + jobs
+            self.run(args + [repo_url, repo])
         self.logger.info("SDL Wiki repository is up to date.")
 
 
@@ -80,6 +138,6 @@ if __name__ == "__main__":
     base = WikiBase(params)
     base.log()  # Always log before doing anything else
     base.test()
-    result = base.run(["echo", "hello,", "world!"])
-    print(result.stdout.strip())
+    result = base.run(["echo", "hello,", "world!"], capture=True)
+    print(result.stdout.decode("utf-8").strip())
     base.clone()
@@ -16,6 +16,7 @@ If it isn't used, it's trivial to remove. So no real loss here.
 import logging
 import sys
 from threading import Lock
+from typing import Dict, Tuple
 
 
 class AutoLogger:
@@ -24,6 +25,7 @@ class AutoLogger:
     """
 
     lock = Lock()
+    _cache: Dict[Tuple[str, bool], logging.Logger] = {}
 
     @classmethod
     def create(cls, cls_name: str, verbose: bool) -> logging.Logger:
@@ -35,11 +37,23 @@ class AutoLogger:
         :return: Configured logger instance.
         """
         _level = logging.DEBUG if verbose else logging.INFO
+
+        # Fast path: loggers are only configured once per (name, verbosity)
+        key = (cls_name, verbose)
+        cached = cls._cache.get(key)
+        if cached is not None and cached.level == _level:
+            return cached
+
         _format = "%(levelname)s:%(filename)s:%(lineno)d: %(message)s"
         _logger = logging.getLogger(cls_name)
 
         # Thread-safe check to avoid duplicate handlers
         with cls.lock:
+            # Double-checked: another thread may have configured it while we waited
+            cached = cls._cache.get(key)
+            if cached is not None and cached.level == _level:
+                return cached
+
             if _logger.level != _level:
                 _logger.setLevel(_level)
 
@@ -50,4 +64,6 @@ class AutoLogger:
                 handler.setFormatter(formatter)
                 _logger.addHandler(handler)
 
+            cls._cache[key] = _logger
+
         return _logger
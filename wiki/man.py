@@ -6,86 +6,259 @@ Description:
 
 import datetime
 import gzip
+import http.client
+import itertools
+import json
 import os
 import pathlib
+import re
 import shutil
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+import socket
+import subprocess
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
-from wiki.base import WikiBase
+from wiki.base import WikiBase, which
 from wiki.params import WikiParameters
 
+# Compiled once at import; scanning the raw bytes keeps the per-file work in C
+_TITLE_RE = re.compile(rb"^# ([^\r\n]+)", re.M)
+_DESC_RE = re.compile(rb"^[ \t]*([^\s#][^\r\n]*)", re.M)
+
 
 class WikiTextToMan(WikiBase):
+    # Number of Markdown files handed to a worker per task
+    BATCH_SIZE = 16
+    # Seconds to wait on the pandoc server for a single batch
+    SERVER_TIMEOUT = 300
+    # Smallest Man page worth compressing with pigz instead of the gzip module
+    PIGZ_MIN_SIZE = 4 << 20
+
     def __init__(self, params: WikiParameters):
         super().__init__(params)
+        self.server: Optional[subprocess.Popen[bytes]] = None
 
-    def compress_man_page(self, man_file: pathlib.Path) -> None:
-        """Compresses the Man page using gzip."""
+    @staticmethod
+    def compress_man_page(man_file: pathlib.Path) -> pathlib.Path:
+        """Compresses the Man page using gzip and returns the compressed path."""
         compressed_file = man_file.with_suffix(".3.gz")
+        # A typical page is a few KB, where spawning pigz costs more than gzip in-process;
+        # only hand pigz pages big enough for its threads to pay off
+        if man_file.stat().st_size >= WikiTextToMan.PIGZ_MIN_SIZE and which("pigz"):
+            # pigz replaces the source file
+            args = ["pigz", "-f", "-9", os.fspath(man_file)]
+            subprocess.run(args, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            return compressed_file
         with open(man_file, "rb") as source:
             with gzip.open(compressed_file, "wb") as target:
                 shutil.copyfileobj(source, target)
         man_file.unlink()  # Remove the uncompressed file
-        self.logger.debug(f"Compressed {man_file} to {compressed_file}")
+        return compressed_file
 
-    def generate_meta_data(self, file_path: pathlib.Path) -> List[str]:
+    @staticmethod
+    def extract_meta_data(file_path: pathlib.Path) -> Dict[str, str]:
         """
         Extracts metadata for Pandoc by seeking out the first line that starts with a # character.
         """
         title = None
         description = None
-        with open(file_path, "r", encoding="utf-8") as source:
-            for line in source:
-                if line.startswith("# "):
-                    title = line[2:].strip()
-                    continue
-                if title and line.strip():
-                    description = line.strip()
-                    break
-        return [
-            "--metadata",
-            f"title={title}",
-            "--metadata",
-            f"name={title}",
-            "--metadata",
-            f"description={description}",
-            "--metadata",
-            "section=3",
-            "--metadata",
-            f"date={datetime.date.today().isoformat()}",
-            "--metadata",
-            "source=SDL Wiki",
-            "--metadata",
-            "manual=SDL Library Manual",
-        ]
-
-    def process_file(self, md_file: pathlib.Path) -> None:
+        # The heading and its summary are always at the top of the page
+        with open(file_path, "rb") as source:
+            head = source.read(4096)
+        title_match = _TITLE_RE.search(head)
+        if title_match:
+            title = title_match.group(1).decode("utf-8", "replace").strip()
+            description_match = _DESC_RE.search(head, title_match.end())
+            if description_match:
+                description = description_match.group(1).decode("utf-8", "replace").strip()
+        return {
+            "title": f"{title}",
+            "name": f"{title}",
+            "description": f"{description}",
+            "section": "3",
+            "date": datetime.date.today().isoformat(),
+            "source": "SDL Wiki",
+            "manual": "SDL Library Manual",
+        }
+
+    @staticmethod
+    def generate_meta_data(file_path: pathlib.Path) -> List[str]:
+        """Formats the extracted metadata as Pandoc command line arguments."""
+        args: List[str] = []
+        for key, value in WikiTextToMan.extract_meta_data(file_path).items():
+            args += ["--metadata", f"{key}={value}"]
+        return args
+
+    @staticmethod
+    def process_file(
+        md_path: str, man_output_dir: pathlib.Path, log_dir: pathlib.Path
+    ) -> pathlib.Path:
         """
-        Converts a single Markdown file to a Man page using Pandoc.
+        Converts a single Markdown file to a compressed Man page using Pandoc.
+        Runs in a worker process, so the result is reported back to the parent instead of logged.
         """
-        man_file = self.params.MAN_OUTPUT_DIR / md_file.with_suffix(".3").name
-        metadata = self.generate_meta_data(md_file)
-        self.logger.debug(f"Converting {md_file} to {man_file}")
+        md_file = pathlib.Path(md_path)
+        man_file = man_output_dir / md_file.with_suffix(".3").name
+        metadata = WikiTextToMan.generate_meta_data(md_file)
         args = [
             "pandoc",
-            str(md_file),
+            md_path,
             "-s",
             "-t",
             "man",
             "-o",
-            str(man_file),
+            os.fspath(man_file),
         ] + metadata
 
-        result = self.run(args)
+        try:
+            subprocess.run(args, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            # Keep pandoc's diagnostics out of memory and the console; they can be long
+            log_dir.mkdir(parents=True, exist_ok=True)
+            log_file = log_dir / md_file.with_suffix(".err").name
+            log_file.write_bytes(e.stderr)
+            message = f"Pandoc failed on {md_file} ({e.returncode}), see {log_file}"
+            raise RuntimeError(message) from e
+
+        return WikiTextToMan.compress_man_page(man_file)
+
+    @staticmethod
+    def process_batch_with_server(
+        md_paths: List[str], man_output_dir: pathlib.Path, server_url: str
+    ) -> Tuple[List[Tuple[str, Optional[pathlib.Path], Optional[str]]], List[str]]:
+        """
+        Converts a batch of Markdown files with a single request to a running pandoc server.
+        Returns the results for the files the server converted, and the files it did not convert.
+        Raises OSError, ValueError or HTTPException if the server cannot be reached
+        or its reply is unusable.
+        """
+        jobs = []
+        sent: List[str] = []
+        unconverted: List[str] = []
+        for md_path in md_paths:
+            md_file = pathlib.Path(md_path)
+            try:
+                text = md_file.read_text(encoding="utf-8")
+                metadata = WikiTextToMan.extract_meta_data(md_file)
+            except (OSError, ValueError):
+                unconverted.append(md_path)  # Let the per-file path report it
+                continue
+            # Metadata, not variables: the man writer escapes it, as with the CLI's --metadata
+            jobs.append(
+                {
+                    "text": text,
+                    "from": "markdown",
+                    "to": "man",
+                    "standalone": True,
+                    "metadata": metadata,
+                }
+            )
+            sent.append(md_path)
+
+        request = urllib.request.Request(
+            f"{server_url}/batch",
+            data=json.dumps(jobs).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=WikiTextToMan.SERVER_TIMEOUT) as response:
+            replies = json.load(response)
+        if not isinstance(replies, list) or len(replies) != len(sent):
+            raise ValueError("Unexpected reply from pandoc server")
 
-        # Log the stderr output in case of errors
-        if result.returncode != 0:
-            self.logger.error(f"Pandoc failed with error code {result.returncode}")
-            self.logger.error(result.stderr)
-        else:
-            self.compress_man_page(man_file)
-            self.logger.debug(f"Man page saved as {man_file}")
+        results: List[Tuple[str, Optional[pathlib.Path], Optional[str]]] = []
+        for md_path, reply in zip(sent, replies):
+            if not isinstance(reply, dict) or "output" not in reply:
+                unconverted.append(md_path)
+                continue
+            try:
+                man_file = man_output_dir / pathlib.Path(md_path).with_suffix(".3").name
+                man_file.write_text(reply["output"], encoding="utf-8")
+                results.append((md_path, WikiTextToMan.compress_man_page(man_file), None))
+            except Exception as e:
+                results.append((md_path, None, str(e)))
+        return results, unconverted
+
+    @staticmethod
+    def process_batch(
+        md_paths: List[str],
+        man_output_dir: pathlib.Path,
+        log_dir: pathlib.Path,
+        server_url: Optional[str] = None,
+    ) -> List[Tuple[str, Optional[pathlib.Path], Optional[str]]]:
+        """
+        Converts a batch of Markdown files in a single worker task.
+        Returns the source path of each file with either the Man page path or the error message,
+        so a single failure does not abort the rest of the batch.
+        """
+        results: List[Tuple[str, Optional[pathlib.Path], Optional[str]]] = []
+        if server_url is not None:
+            try:
+                results, md_paths = WikiTextToMan.process_batch_with_server(
+                    md_paths, man_output_dir, server_url
+                )
+            except (OSError, ValueError, http.client.HTTPException):
+                pass  # Fall back to one pandoc process per file for the whole batch
+
+        # Files the server did not convert go through the pandoc CLI one at a time
+        for md_path in md_paths:
+            try:
+                man_file = WikiTextToMan.process_file(md_path, man_output_dir, log_dir)
+                results.append((md_path, man_file, None))
+            except Exception as e:
+                results.append((md_path, None, str(e)))
+        return results
+
+    def start_server(self) -> Optional[str]:
+        """
+        Starts a long-lived pandoc server so pandoc is not spawned once per file.
+        Returns the server URL, or None if this pandoc build does not provide a server.
+        """
+        # The free port is released before pandoc binds it, so another process may take it first
+        for _ in range(2):
+            url = self._start_server_on_free_port()
+            if url is not None:
+                return url
+
+        self.logger.debug("Pandoc server unavailable, falling back to the pandoc CLI")
+        return None
+
+    def _start_server_on_free_port(self) -> Optional[str]:
+        """Starts pandoc server on a free port and waits for it to answer, returning its URL."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        try:
+            self.server = subprocess.Popen(
+                ["pandoc", "server", "--port", str(port)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and self.server.poll() is None:
+            try:
+                with urllib.request.urlopen(f"{url}/version", timeout=1):
+                    self.logger.debug("Pandoc server listening on %s", url)
+                    return url
+            except (OSError, http.client.HTTPException):
+                time.sleep(0.1)
+
+        self.stop_server()
+        return None
+
+    def stop_server(self) -> None:
+        """Terminates the pandoc server, if one is running."""
+        if self.server is not None:
+            self.server.terminate()
+            self.server.wait()
+            self.server = None
 
     def convert(self) -> None:
         """
@@ -95,24 +268,48 @@ class WikiTextToMan(WikiBase):
         failed = 0
 
         self.logger.info("Starting parallel Markdown to Man page conversion...")
-        # Collect all files to be processed
-        files_to_process: List[pathlib.Path] = []
-        for version_dir in self.params.IR_VERSION_DIRS:
-            for root, _, files in os.walk(version_dir):
-                for file in files:
-                    if file.endswith(".md"):
-                        files_to_process.append(pathlib.Path(root) / file)
-
-        # Use ThreadPoolExecutor for parallel processing
-        with ThreadPoolExecutor(max_workers=(os.cpu_count() or 4)) as executor:
-            futures = [executor.submit(self.process_file, file) for file in files_to_process]
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                    processed += 1
-                except Exception as e:
-                    self.logger.error(f"Error processing file: {e}")
-                    failed += 1
+        # Stream file paths straight into the pool instead of materializing them first
+        files_to_process = (
+            path
+            for entry, path in self.params.iter_version_files(ir=True)
+            if entry.name.endswith(".md")
+        )
+        # Hand out files in batches to amortize the per-task dispatch overhead
+        batches = iter(lambda: list(itertools.islice(files_to_process, self.BATCH_SIZE)), [])
+
+        # Use ProcessPoolExecutor so the Python-side work is not serialized by the GIL
+        man_output_dir = self.params.MAN_OUTPUT_DIR
+        server_url = self.start_server()
+        try:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = {
+                    executor.submit(
+                        self.process_batch,
+                        batch,
+                        man_output_dir,
+                        self.params.LOG_OUTPUT_DIR,
+                        server_url,
+                    ): batch
+                    for batch in batches
+                }
+                for future in as_completed(futures):
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        # A dead worker breaks the pool; count its batch instead of aborting the run
+                        batch = futures[future]
+                        self.logger.error(f"Error processing {len(batch)} files: {e}")
+                        failed += len(batch)
+                        continue
+                    for md_path, man_file, error in results:
+                        if error is None:
+                            self.logger.debug("Converted %s to %s", md_path, man_file)
+                            processed += 1
+                        else:
+                            self.logger.error(f"Error processing file: {error}")
+                            failed += 1
+        finally:
+            self.stop_server()
 
         self.logger.info(f"Processed: {processed}, Failed: {failed}")
         self.logger.info(f"Man pages saved in {self.params.MAN_OUTPUT_DIR}")
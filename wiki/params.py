@@ -12,6 +12,7 @@ Path Flow:
         - TEXT: OUTPUT_DIR/text/SDL-Wiki-v{version}.md
         - PDF: OUTPUT_DIR/pdf/SDL-Wiki-v{version}.pdf
         - MAN Pages: OUTPUT_DIR/man/<man_file>
+    - Diagnostics: OUTPUT_DIR/logs/<file>.err (failed conversions only)
 
 Design Rationale:
     - REPO_PATH is the original source input.
@@ -22,12 +23,58 @@ Design Rationale:
 """
 
 import dataclasses
+import functools
+import os
 import pathlib
-from typing import Any, Dict, List, Literal
+import types
+from typing import Any, Callable, Dict, Iterator, List, Literal, Mapping, Tuple
 
+# Accepted values for the conversion_type and version fields
+_VALID_TYPES = frozenset(("text", "pdf", "man"))
+_VALID_VERSIONS = frozenset(("2", "3"))
 
-@dataclasses.dataclass
+# The SDL libraries documented by the wiki, as suffixes of the SDL{version} prefix
+_SDL_SUBMODULES: Tuple[str, ...] = ("", "_image", "_mixer", "_net", "_ttf")
+
+# Source directory names for each supported SDL Wiki version
+_VERSION_MAP: Dict[str, Tuple[str, ...]] = {
+    version: tuple(f"SDL{version}{sub}" for sub in _SDL_SUBMODULES) for version in _VALID_VERSIONS
+}
+
+
+def _cached_property(method: Callable[[Any], Any]) -> property:
+    """
+    Slot-compatible stand-in for functools.cached_property.
+    Stores each computed value in the instance's _cache dict under the method name.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def getter(self: Any) -> Any:
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = method(self)
+            return value
+
+    return property(getter)
+
+
+@dataclasses.dataclass(frozen=True)
 class WikiParameters:
+    # Fixed field set plus the property cache; no per-instance __dict__
+    # Frozen, so instances are hashable and can key functools caches
+    __slots__ = (
+        "repo",
+        "root",
+        "conversion_type",
+        "version",
+        "verbose",
+        "_basename_md",
+        "_basename_pdf",
+        "_cache",
+    )
+
     repo: str  # The repository path to clone, sync, or reference
     root: str  # The parent path for the current working directory
     conversion_type: Literal["text", "pdf", "man"]  # Type of conversion process
@@ -35,107 +82,213 @@ class WikiParameters:
     verbose: bool  # Enable debug info
 
     def __post_init__(self):
+        # Frozen instances can only be initialized through object.__setattr__
+        object.__setattr__(self, "_cache", {})
+
         # Default to upstream source
         if self.repo == ".":
-            self.repo = "libsdl-org/sdlwiki"
+            object.__setattr__(self, "repo", "libsdl-org/sdlwiki")
 
         # Default to local path if specified
         if self.root == ".":
-            self.root = pathlib.Path.cwd()
+            object.__setattr__(self, "root", os.getcwd())
 
         # Validate conversion type
-        if self.conversion_type not in {"text", "pdf", "man"}:
+        if self.conversion_type not in _VALID_TYPES:
             raise ValueError(f"Invalid conversion_type: {self.conversion_type}")
 
         # Validate version
-        if self.version not in {"2", "3"}:
+        if self.version not in _VALID_VERSIONS:
             raise ValueError(f"Invalid version: {self.version}")
 
+        # The version is fixed from here on, so the output file names are too
+        object.__setattr__(self, "_basename_md", f"SDL-Wiki-v{self.version}.md")
+        object.__setattr__(self, "_basename_pdf", f"SDL-Wiki-v{self.version}.pdf")
+
     # ========== Core Directory Structure ========== #
 
-    @property
+    # Only the raw strings are stored; Path objects are built on first use and then reused
+
+    @_cached_property
     def ROOT_PATH(self) -> pathlib.Path:
         """The current working directory for the conversion process."""
         return pathlib.Path(self.root)
 
-    @property
+    @_cached_property
     def REPO_PATH(self) -> pathlib.Path:
         """The root path of the cloned SDL Wiki repository."""
         return pathlib.Path(self.repo)
 
-    @property
-    def VERSION_DIRS(self) -> List[pathlib.Path]:
+    @_cached_property
+    def VERSION_DIRS(self) -> Tuple[str, ...]:
         """
         The original source directories for the selected version.
         These represent the unprocessed input directories.
+        Plain strings, since they are only walked; callers wrap them in a Path on demand.
+        """
+        return self._version_dirs(self.repo)
+
+    def iter_version_files(
+        self, ir: bool = False, sort: bool = False
+    ) -> Iterator[Tuple["os.DirEntry[str]", str]]:
+        """
+        Yields (entry, path) for every file below the version directories, recursively.
+        Walks the IR directories instead of the sources when ir is True.
+        With sort, follows os.walk order: each directory's files sorted by name, then its
+        subdirectories in listing order.
+        Uses os.scandir so no intermediate Path objects are created; missing directories are skipped.
         """
-        prefix = f"SDL{self.version}"
-        submodules = ["", "_image", "_mixer", "_net", "_ttf"]
-        return [self.REPO_PATH / f"{prefix}{sub}" for sub in submodules]
+        stack = list(reversed(self.IR_VERSION_DIRS if ir else self.VERSION_DIRS))
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    entries = list(it)
+            except FileNotFoundError:
+                continue
+            subdirs: List[str] = []
+            files: List["os.DirEntry[str]"] = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    files.append(entry)
+            if sort:
+                files.sort(key=lambda entry: entry.name)
+                subdirs.reverse()  # The first listed subdirectory is popped next
+            for entry in files:
+                yield entry, entry.path
+            stack.extend(subdirs)
 
     # ========== Output Directories and Files ========== #
 
-    @property
+    @_cached_property
     def OUTPUT_DIR(self) -> pathlib.Path:
         """Root directory for all final output files."""
-        return self._ensure_directory(self.ROOT_PATH / "output")
+        return self.ROOT_PATH / "output"
 
-    @property
+    @_cached_property
     def TEXT_OUTPUT_DIR(self) -> pathlib.Path:
         """Directory for storing concatenated Markdown files."""
-        return self._ensure_directory(self.OUTPUT_DIR / "text")
+        return self.OUTPUT_DIR / "text"
 
-    @property
+    @_cached_property
     def PDF_OUTPUT_DIR(self) -> pathlib.Path:
         """Directory for storing generated PDF files."""
-        return self._ensure_directory(self.OUTPUT_DIR / "pdf")
+        return self.OUTPUT_DIR / "pdf"
 
-    @property
+    @_cached_property
     def MAN_OUTPUT_DIR(self) -> pathlib.Path:
         """Directory for storing generated MAN pages."""
-        return self._ensure_directory(self.OUTPUT_DIR / "man")
+        return self.OUTPUT_DIR / "man"
+
+    @_cached_property
+    def LOG_OUTPUT_DIR(self) -> pathlib.Path:
+        """
+        Directory for storing diagnostics from failed conversions.
+        Only created once there is something to write.
+        """
+        return self.OUTPUT_DIR / "logs"
 
     # ========== Intermediate Representation (IR) ========== #
 
-    @property
+    @_cached_property
     def IR_DIR(self) -> pathlib.Path:
         """
         Intermediate Representation (IR) directory for all processed files.
         These are sanitized and normalized Markdown files, ready for further processing.
         """
-        return self._ensure_directory(self.TEXT_OUTPUT_DIR / "intermediate")
+        return self.TEXT_OUTPUT_DIR / "intermediate"
 
-    @property
-    def IR_VERSION_DIRS(self) -> list[pathlib.Path]:
+    @_cached_property
+    def IR_VERSION_DIRS(self) -> Tuple[str, ...]:
         """
         Directories containing IR files for further processing.
         Mirrors the structure of VERSION_DIRS.
         """
-        prefix = f"SDL{self.version}"
-        submodules = ["", "_image", "_mixer", "_net", "_ttf"]
-        return [self.IR_DIR / f"{prefix}{sub}" for sub in submodules]
+        return self._version_dirs(os.fspath(self.IR_DIR))
 
     # ========== Final Output Files ========== #
 
-    @property
+    @_cached_property
     def TEXT_OUTPUT_FILE(self) -> pathlib.Path:
         """
         Concatenated Markdown file, used as input for generating PDFs.
         """
-        return self.TEXT_OUTPUT_DIR / f"SDL-Wiki-v{self.version}.md"
+        return pathlib.Path(self.TEXT_OUTPUT_FILE_STR)
 
-    @property
+    @_cached_property
     def PDF_OUTPUT_FILE(self) -> pathlib.Path:
         """Final PDF file generated from the concatenated Markdown."""
-        return self.PDF_OUTPUT_DIR / f"SDL-Wiki-v{self.version}.pdf"
+        return pathlib.Path(self.PDF_OUTPUT_FILE_STR)
+
+    @_cached_property
+    def TEXT_OUTPUT_FILE_STR(self) -> str:
+        """TEXT_OUTPUT_FILE as a plain string, for subprocess arguments."""
+        return os.path.join(self.root, "output", "text", self._basename_md)
+
+    @_cached_property
+    def PDF_OUTPUT_FILE_STR(self) -> str:
+        """PDF_OUTPUT_FILE as a plain string, for subprocess arguments."""
+        return os.path.join(self.root, "output", "pdf", self._basename_pdf)
 
     # ========== Utilities ========== #
 
+    def _version_dirs(self, parent: str) -> Tuple[str, ...]:
+        """Joins the selected version's library directory names onto parent."""
+        return tuple(os.path.join(parent, name) for name in _VERSION_MAP[self.version])
+
     def _ensure_directory(self, path: pathlib.Path) -> pathlib.Path:
         """Helper to create directory if it doesn't exist."""
         path.mkdir(parents=True, exist_ok=True)
         return path
 
-    def as_dict(self) -> Dict[str, Any]:
-        """Returns a dictionary representation of the defined parameters."""
-        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+    def prepare(self) -> None:
+        """
+        Creates the output directories used by every conversion type.
+        Called once at pipeline start; the path properties themselves are side-effect free.
+        """
+        if self._cache.get("_prepared"):
+            return
+
+        targets = {
+            os.fspath(path)
+            for path in (
+                self.OUTPUT_DIR,
+                self.TEXT_OUTPUT_DIR,
+                self.PDF_OUTPUT_DIR,
+                self.MAN_OUTPUT_DIR,
+                self.IR_DIR,
+            )
+        }
+        targets.update(self.IR_VERSION_DIRS)
+        # Parents sort before their children; assume each is missing and handle EEXIST
+        for path in sorted(targets, key=lambda p: p.count(os.sep)):
+            try:
+                os.mkdir(path)
+            except FileExistsError:
+                pass
+            except FileNotFoundError:
+                # Ancestors above the output tree are missing as well
+                self._ensure_directory(pathlib.Path(path))
+
+        self._cache["_prepared"] = True
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickles through __init__, since frozen slots cannot be restored by setattr."""
+        return (self.__class__, tuple(getattr(self, f.name) for f in dataclasses.fields(self)))
+
+    @_cached_property
+    def as_dict(self) -> Mapping[str, Any]:
+        """
+        A read-only mapping of the defined parameters.
+        Built once and shared, which is safe since the instance is frozen.
+        """
+        return types.MappingProxyType(
+            {
+                "repo": self.repo,
+                "root": self.root,
+                "conversion_type": self.conversion_type,
+                "version": self.version,
+                "verbose": self.verbose,
+            }
+        )
@@ -15,49 +15,63 @@ Caveats:
       it could be threaded, but would fail to preserve paging which is undesirable.
 """
 
+import hashlib
+import os
+
 from wiki.base import WikiBase
 from wiki.params import WikiParameters
 
 
 class WikiTextToPDF(WikiBase):
+    # Pandoc options that do not depend on the input or output file
+    PANDOC_FLAGS = (
+        "--pdf-engine=xelatex",
+        "--from",
+        "markdown-raw_tex",
+        "--strip-comments",
+        "--wrap=preserve",
+        "-V",
+        "geometry:margin=0.5in",
+        "-V",
+        "geometry:a4paper",
+        "-V",
+        "mainfont=Noto Sans Mono",
+        "-V",
+        "fontsize=10pt",
+        "-V",
+        "linestretch=1.2",
+        "-V",
+        "colorlinks=true",
+        "-V",
+        "linkcolor=blue",
+    )
+
     def __init__(self, params: WikiParameters):
         super().__init__(params)
 
     def convert(self) -> None:
-        self.logger.info(
-            f"Converting {self.params.TEXT_OUTPUT_FILE} to {self.params.PDF_OUTPUT_FILE}..."
-        )
+        input_file = self.params.TEXT_OUTPUT_FILE_STR
+        output_file = self.params.PDF_OUTPUT_FILE_STR
+        self.logger.info(f"Converting {input_file} to {output_file}...")
 
         # Check if the input file exists and is readable
-        if not self.params.TEXT_OUTPUT_FILE.is_file():
-            self.logger.error(f"Input file does not exist: {self.params.TEXT_OUTPUT_FILE}")
+        if not os.path.isfile(input_file):
+            self.logger.error(f"Input file does not exist: {input_file}")
             return
 
-        args = [
-            "pandoc",
-            str(self.params.TEXT_OUTPUT_FILE),
-            "-o",
-            str(self.params.PDF_OUTPUT_FILE),
-            "--pdf-engine=xelatex",
-            "--from",
-            "markdown-raw_tex",
-            "--strip-comments",
-            "--wrap=preserve",
-            "-V",
-            "geometry:margin=0.5in",
-            "-V",
-            "geometry:a4paper",
-            "-V",
-            "mainfont=Noto Sans Mono",
-            "-V",
-            "fontsize=10pt",
-            "-V",
-            "linestretch=1.2",
-            "-V",
-            "colorlinks=true",
-            "-V",
-            "linkcolor=blue",
-        ]
+        args = ["pandoc", input_file, "-o", output_file, *self.PANDOC_FLAGS]
+
+        # Skip pandoc entirely when neither the input nor the options changed
+        with open(input_file, "rb") as source:
+            digest = hashlib.blake2b(source.read(), digest_size=16)
+        digest.update("\0".join(args).encode("utf-8"))
+        checksum = digest.hexdigest()
+        checksum_file = output_file + ".sha"
+        if os.path.isfile(output_file) and os.path.isfile(checksum_file):
+            with open(checksum_file, "r", encoding="utf-8") as source:
+                if source.read().strip() == checksum:
+                    self.logger.info(f"PDF is up to date (cached): {output_file}")
+                    return
 
         # Run the command and capture output
         result = self.run(args)
@@ -65,9 +79,11 @@ class WikiTextToPDF(WikiBase):
         # Log the stderr output in case of errors
         if result.returncode != 0:
             self.logger.error(f"Pandoc failed with error code {result.returncode}")
-            self.logger.error(result.stderr)
+            self.logger.error(result.stderr.decode("utf-8", "replace"))
         else:
-            self.logger.info(f"PDF saved as {self.params.PDF_OUTPUT_FILE}")
+            with open(checksum_file, "w", encoding="utf-8") as target:
+                target.write(checksum + "\n")
+            self.logger.info(f"PDF saved as {output_file}")
 
 
 if __name__ == "__main__":
@@ -18,140 +18,319 @@ Caveats:
 """
 
 import os
-import pathlib
+import re
+import shutil
 import unicodedata
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
 
 import html2text
-import regex as re
 
-from wiki.base import WikiBase
+from wiki.base import WikiBase, cached_fspath
 from wiki.params import WikiParameters
 
+# Keeps Windows from translating line breaks in the raw reads and writes below
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
 
 class WikiHTMLToText(WikiBase):
+    # Files the text pipeline converts; everything else in the wiki repo is skipped
+    SOURCE_SUFFIXES = (".html", ".md")
+    # Files handed to a worker per task, and the most characters one batch may hold
+    BATCH_SIZE = 64
+    BATCH_MAX_CHARS = 1 << 20
+    # Separates the pages of a batch; the sanitize rules never match across a line break
+    BATCH_SENTINEL = "\n\x00FILE\x00\n"
+    # Bytes copied per read when concatenating the processed pages
+    COPY_BUFFER_SIZE = 1 << 20
+    # Curly quotes become escaped straight quotes, as the original r"\"" template produced
+    _QUOTE_TRANS = str.maketrans({"\u201C": '\\"', "\u201D": '\\"'})
+    # The remaining sanitize rules fused into one alternation, compiled once at import, so the text
+    # is scanned a single time. No branch may match across a line break, and the link branches use
+    # delimiter-excluding classes instead of lazy dots so a line full of "[" cannot backtrack.
+    # Plain stdlib re on purpose: none of the rules need the regex module's extras.
+    _SANITIZE_PATTERN = re.compile(
+        r"(?P<hr>^----[^\S\n\x1f]*$)"  # Horizontal line; \x1f kept out as before
+        # Inline links -> keep text
+        r"|(?P<inline>\[(?P<inline_text>(?:[^\[\]\n]|\[[^\[\]\n]*\])*)\]\([^)\n]*\))"
+        r"|(?P<ref>\[(?P<ref_text>[^\[\]\n]+)\]\[[^\]\n]+\])"  # Reference links -> keep text
+        r"|(?P<refdef>^\[[^\]\n]*\]:[^\n]*$)"  # Remove link references
+        r"|(?P<empty>\(\))",  # Remove empty parentheses
+        re.M,
+    )
+    # Each branch of the pattern above needs at least one of these substrings
+    _SANITIZE_NEEDLES = ("[", "()", "----")
+
     def __init__(self, params: WikiParameters):
         super().__init__(params)
 
-    def sanitize(self, text: str) -> str:
+    @staticmethod
+    def _sanitize_match(match: "re.Match[str]") -> str:
+        """Returns the replacement for whichever sanitize rule matched."""
+        rule = match.lastgroup
+        if rule == "hr":
+            return "<!-- Horizontal line omitted for PDF and MAN -->"
+        if rule == "inline":
+            return match.group("inline_text")
+        if rule == "ref":
+            return match.group("ref_text")
+        return ""  # refdef and empty are removed outright
+
+    @classmethod
+    def sanitize(cls, text: str) -> str:
         """
         Sanitizes Markdown text by applying various regex patterns to remove or replace unwanted content.
         """
-        patterns = {
-            r"\u201C": r"\"",  # Curly quote to straight quote
-            r"\u201D": r"\"",  # Curly quote to straight quote
-            r"^----$": r"<!-- Horizontal line omitted for PDF and MAN -->",
-            r"^----\s*$": r"<!-- Horizontal line omitted for PDF and MAN -->",
-            r"\[(.*?)\]\(.*?\)": r"\1",  # Inline links -> keep text
-            r"\[([^\]]+)\]\[[^\]]+\]": r"\1",  # Reference links -> keep text
-            r"^\[.*?\]:\s?.*?$": "",  # Remove link references
-            r"\(\)": "",  # Remove empty parentheses
-        }
-        compiled_patterns = [(re.compile(pat), repl) for pat, repl in patterns.items()]
-        lines = text.splitlines()
-        for n, line in enumerate(lines):
-            for pattern, replacement in compiled_patterns:
-                line = pattern.sub(replacement, line)
-            lines[n] = line
-        return "\n".join(lines)
-
-    def normalize(self, text: str) -> str:
+        # Swap the quotes in one C-level pass, then unify line breaks so the fused pattern can run
+        # over the whole text in a single call
+        text = "\n".join(text.translate(cls._QUOTE_TRANS).splitlines())
+        # Every rule needs one of these substrings, and a few "in" checks cost far less than a scan
+        if not any(needle in text for needle in cls._SANITIZE_NEEDLES):
+            return text
+        return cls._SANITIZE_PATTERN.sub(cls._sanitize_match, text)
+
+    @staticmethod
+    def _nfkc(text: str) -> str:
+        """Returns text in NFKC form, skipping the full pass when it is already normalized."""
+        # Plain ASCII is always NFKC, and the quick check is far cheaper than normalizing
+        if text.isascii() or unicodedata.is_normalized("NFKC", text):
+            return text
+        return unicodedata.normalize("NFKC", text)
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
         """
         Normalizes text to NFKC form for consistent Unicode handling and removes leading/trailing whitespace.
         """
-        return unicodedata.normalize("NFKC", text).strip()
+        return cls._nfkc(text).strip()
 
-    def html_to_text(self, html_file: pathlib.Path) -> str:
+    @staticmethod
+    def markdown_from_html(html_content: str) -> str:
         """
-        Converts an HTML file to Markdown using the html2text Python API.
+        Converts HTML content to Markdown using the html2text Python API.
         """
-        self.logger.debug(f"Converting {html_file} to Markdown using html2text API")
-
-        with open(html_file, "r", encoding="utf-8") as source:
-            html_content = source.read()
-
         converter = html2text.HTML2Text()
         converter.wrap_links = False
         converter.wrap_tables = True
         converter.images_to_alt = True
         converter.body_width = 0
 
-        markdown = converter.handle(html_content)
-        return markdown
+        return converter.handle(html_content)
+
+    @staticmethod
+    def read_source(file_path: str) -> str:
+        """
+        Reads a source file as UTF-8 text with universal newlines.
+        Uses raw os.read calls sized from fstat, so small pages take a single read.
+        """
+        fd = os.open(file_path, os.O_RDONLY | _O_BINARY)
+        try:
+            chunks = [os.read(fd, os.fstat(fd).st_size or WikiHTMLToText.COPY_BUFFER_SIZE)]
+            while chunks[-1]:
+                chunks.append(os.read(fd, WikiHTMLToText.COPY_BUFFER_SIZE))
+        finally:
+            os.close(fd)
+
+        text = b"".join(chunks).decode("utf-8")
+        # Match text-mode reads, which html2text relies on;
+        # Markdown gets its line breaks unified later anyway
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    @classmethod
+    def process_batch(
+        cls, items: List[Tuple[str, bool]]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Runs the CPU-bound part of the pipeline on a batch of (text, is_html) items:
+        HTML to Markdown if needed, then a single normalize and sanitize call on the joined pages,
+        which is split back into one page per item.
+        Runs in a worker process, so it takes and returns plain strings only.
+        Returns (markdown, None) or (None, error) for each item, so a bad page fails on its own.
+        """
+        results: List[Tuple[Optional[str], Optional[str]]] = []
+        for text, is_html in items:
+            try:
+                results.append((cls.markdown_from_html(text) if is_html else text, None))
+            except Exception as e:
+                results.append((None, str(e)))
+
+        converted = [index for index, (page, _) in enumerate(results) if page is not None]
+        markdown = [results[index][0] for index in converted]
+        try:
+            # A page could contain the sentinel, so leave those batches to the per-page path
+            if any("\x00" in page for page in markdown):
+                raise ValueError("Batch contains a NUL byte")
+            for index, page in zip(converted, cls._process_joined(markdown)):
+                results[index] = (page, None)
+            return results
+        except Exception:
+            pass  # Retry page by page so only the broken pages fail
+
+        for index, page in zip(converted, markdown):
+            try:
+                results[index] = (cls.sanitize(cls.normalize(page)) + "\n", None)
+            except Exception as e:
+                results[index] = (None, str(e))
+        return results
+
+    @classmethod
+    def _process_joined(cls, markdown: List[str]) -> List[str]:
+        """Normalizes and sanitizes Markdown pages as one joined text, returning one string per page."""
+        sentinel = cls.BATCH_SENTINEL
+        # Strip each page rather than the joined text, which would eat into an empty page's sentinel
+        joined = cls._nfkc(sentinel.join(markdown))
+        pages = [page.strip() for page in joined.split(sentinel)]
+        # Close the last page with a sentinel too;
+        # sanitize drops the final line break, so restore it
+        sanitized = cls.sanitize(sentinel.join(pages) + sentinel) + "\n"
+        return [page + "\n" for page in sanitized.split(sentinel)[:-1]]
+
+    def output_paths(self, file_paths: List[str]) -> Dict[str, str]:
+        """
+        Maps source files below the repository to their intermediate Markdown paths,
+        and creates each distinct output directory once.
+        """
+        # Source paths are joined onto params.repo, so plain string slicing gives the relative path
+        repo_prefix = os.path.join(self.params.repo, "")
+        ir_dir = cached_fspath(self.params.IR_DIR)
+        output_paths = {}
+        for file_path in file_paths:
+            relative_path = os.path.splitext(file_path[len(repo_prefix):])[0] + ".md"
+            output_paths[file_path] = os.path.join(ir_dir, relative_path)
+        for output_dir in {os.path.dirname(output_file) for output_file in output_paths.values()}:
+            os.makedirs(output_dir, exist_ok=True)
+        return output_paths
+
+    def write_output(self, file_path: str, output_file: str, markdown: str) -> None:
+        """
+        Writes processed Markdown to the intermediate directory.
+        """
+        data = memoryview(markdown.encode("utf-8"))
+        fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o666)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+        self.logger.debug("Processed %s -> %s", file_path, output_file)
 
     def convert(self) -> None:
         """
         Converts HTML files to Markdown and sanitizes existing Markdown files in parallel.
         Outputs to the intermediate directory to preserve original files.
+
+        Reads and writes run in a thread pool, while the conversion itself runs in a process pool
+        so the regex and html2text work is not serialized by the GIL. Each finished stage hands
+        its file on to the next one, so I/O and CPU work overlap.
         """
         processed = 0
         failed = 0
 
         self.logger.info("Starting parallel HTML to Markdown conversion...")
-        # Collect all files to be processed
-        files_to_process: List[pathlib.Path] = []
-        for version_dir in self.params.VERSION_DIRS:
-            for root, _, files in os.walk(version_dir):
-                for file in files:
-                    file_path = pathlib.Path(root) / file
-                    files_to_process.append(file_path)
-
-        # Use ThreadPoolExecutor for parallel processing
-        with ThreadPoolExecutor(max_workers=(os.cpu_count() or 4)) as executor:
-            futures = [executor.submit(self.process_file, file) for file in files_to_process]
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                    processed += 1
-                except Exception as e:
-                    self.logger.error(f"Error processing file: {e}")
-                    failed += 1
+        # Collect all files to be processed as plain path strings
+        files_to_process: List[str] = []
+        for entry, file_path in self.params.iter_version_files():
+            if entry.name.endswith(self.SOURCE_SUFFIXES):
+                files_to_process.append(file_path)
+            else:
+                self.logger.debug("Skipping unsupported file: %s", file_path)
+        output_paths = self.output_paths(files_to_process)
 
-        self.logger.info(f"Processed: {processed}, Failed: {failed}")
-        self.logger.info("HTML to Markdown conversion completed in parallel.")
-
-    def process_file(self, file_path: pathlib.Path) -> None:
-        """
-        Processes a single file: converts HTML to Markdown or sanitizes existing Markdown.
-        Saves processed files in the intermediate directory.
-        """
-        relative_path = file_path.relative_to(self.params.REPO_PATH)
-        output_file = self.params.IR_DIR / relative_path.with_suffix(".md")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        cpu_count = os.cpu_count() or 4
+        io_workers = min(32, 4 * cpu_count)
+        cpu_workers = max(1, min(cpu_count, -(-len(files_to_process) // self.BATCH_SIZE)))
 
-        markdown = None
-        if file_path.suffix == ".html":
-            markdown = self.html_to_text(file_path)
-        elif file_path.suffix == ".md":
-            markdown = file_path.read_text(encoding="utf-8")
+        with ThreadPoolExecutor(max_workers=io_workers) as io_pool, ProcessPoolExecutor(
+            max_workers=cpu_workers
+        ) as cpu_pool:
+            # Each pending future maps to its stage and source files
+            pending: Dict[Future, Tuple[str, List[str]]] = {
+                io_pool.submit(self.read_source, file_path): ("read", [file_path])
+                for file_path in files_to_process
+            }
+            reads_left = len(files_to_process)
+            batch_pool: Executor = cpu_pool
+            batch: List[str] = []
+            batch_items: List[Tuple[str, bool]] = []
+            batch_chars = 0
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, file_paths = pending.pop(future)
+                    if stage == "read":
+                        reads_left -= 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error processing {', '.join(file_paths)}: {e}")
+                        failed += len(file_paths)
+                        stage = "failed"
 
-        if markdown is None:
-            self.logger.debug(f"Skipping unsupported file: {file_path}")
-            return
+                    if stage == "read":
+                        batch.extend(file_paths)
+                        batch_items.append((result, file_paths[0].endswith(".html")))
+                        batch_chars += len(result)
+                    elif stage == "process":
+                        for file_path, (markdown, error) in zip(file_paths, result):
+                            if error is not None:
+                                self.logger.error(f"Error processing {file_path}: {error}")
+                                failed += 1
+                                continue
+                            output_file = output_paths[file_path]
+                            next_future = io_pool.submit(
+                                self.write_output, file_path, output_file, markdown
+                            )
+                            pending[next_future] = ("write", [file_path])
+                    elif stage == "write":
+                        processed += 1
 
-        # Normalize and sanitize the Markdown content
-        markdown = self.normalize(markdown)
-        markdown = self.sanitize(markdown)
+                    # Hand the collected pages to a worker once the batch is full or no reads are left
+                    batch_full = len(batch) >= self.BATCH_SIZE or batch_chars >= self.BATCH_MAX_CHARS
+                    if batch and (batch_full or not reads_left):
+                        try:
+                            next_future = batch_pool.submit(self.process_batch, batch_items)
+                        except BrokenProcessPool:
+                            # A worker died; finish the remaining batches in the I/O threads instead
+                            self.logger.warning(
+                                "Process pool broke, converting the remaining pages in threads"
+                            )
+                            batch_pool = io_pool
+                            next_future = batch_pool.submit(self.process_batch, batch_items)
+                        pending[next_future] = ("process", batch)
+                        batch, batch_items, batch_chars = [], [], 0
 
-        # Write the processed content to the IR directory
-        output_file.write_text(markdown + "\n", encoding="utf-8")
-        self.logger.debug(f"Processed {file_path} -> {output_file}")
+        self.logger.info(f"Processed: {processed}, Failed: {failed}")
+        self.logger.info("HTML to Markdown conversion completed in parallel.")
 
     def concatenate(self) -> None:
         """
         Concatenates all Markdown files into a single combined Markdown file.
         """
         self.logger.info("Concatenating Markdown files...")
-        text_body = ""
-        for version in self.params.IR_VERSION_DIRS:
-            for root, _, files in os.walk(version):
-                for file in sorted(files):
-                    if file.endswith(".md"):
-                        text_file = pathlib.Path(root) / file
-                        self.logger.debug(f"Adding {text_file} to {self.params.TEXT_OUTPUT_FILE}")
-                        text_body += text_file.read_text(encoding="utf-8") + "\n"
-        self.params.TEXT_OUTPUT_FILE.write_text(text_body, encoding="utf-8")
+        # Walk first so the copy loop below only deals with open files
+        text_files = [
+            path
+            for entry, path in self.params.iter_version_files(ir=True, sort=True)
+            if entry.name.endswith(".md")
+        ]
+
+        # The pages are already UTF-8, so copy raw bytes instead of decoding and re-encoding them
+        with open(self.params.TEXT_OUTPUT_FILE_STR, "wb") as output:
+            for text_file in text_files:
+                self.logger.debug("Adding %s to %s", text_file, self.params.TEXT_OUTPUT_FILE_STR)
+                with open(text_file, "rb") as source:
+                    shutil.copyfileobj(source, output, self.COPY_BUFFER_SIZE)
+                output.write(b"\n")
         self.logger.info(f"Combined Markdown saved as {self.params.TEXT_OUTPUT_FILE}")
 
 